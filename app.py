@@ -1,19 +1,33 @@
 # app.py
+import base64
+import hashlib
+import hmac
+import json
 import os
 import random
-from typing import List, Dict, Optional
+import time
+from collections import deque
+from functools import lru_cache
+from itertools import compress, product
+from typing import List, Dict, Iterator, Optional, Tuple
 
 from flask import (
-    Flask, render_template, request, redirect, url_for, flash
+    Flask, render_template, request, redirect, url_for, flash, stream_with_context
 )
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
 from sqlalchemy import (
-    create_engine, Column, String, Integer, JSON
+    create_engine, event, inspect, select, insert, delete, text, Column, String, Integer, JSON
 )
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 # --- Configuration Flask ---
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
+# Cache du bytecode Jinja sur disque : évite de recompiler les templates à chaque démarrage de worker
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
 
 # --- Configuration DB ---
 DATABASE_URL = os.environ.get("DATABASE_URL")
@@ -31,7 +45,28 @@ elif DATABASE_URL.startswith("postgresql://") and not DATABASE_URL.startswith("p
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
 
 # SQLAlchemy setup
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+if DATABASE_URL.startswith("postgresql"):
+    # Pool dimensionné pour plusieurs threads/workers ; pre_ping évite de
+    # réutiliser une connexion coupée par le serveur.
+    engine = create_engine(
+        DATABASE_URL, echo=False, future=True,
+        pool_size=10, max_overflow=20, pool_timeout=30,
+        pool_recycle=1800, pool_pre_ping=True, pool_use_lifo=True,
+    )
+else:
+    engine = create_engine(DATABASE_URL, echo=False, future=True)
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        # WAL + synchronous=NORMAL : un commit ne force plus deux fsync
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA mmap_size=268435456")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
@@ -39,13 +74,14 @@ Base = declarative_base()
 class Config(Base):
     """
     Table clé-valeur pour stocker des blobs JSON (names, compat).
+    compat est stocké compacté (voir pack_compat).
     key: ex. 'names', 'compat'
     value: JSON
     """
     __tablename__ = "config"
     id = Column(Integer, primary_key=True)
     key = Column(String(64), unique=True, nullable=False)
-    value = Column(JSON, nullable=True)
+    value = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
 
 class Participant(Base):
     """
@@ -57,78 +93,170 @@ class Participant(Base):
     receiver = Column(String(200), nullable=False)
 
 # --- Fonction d'initialisation des tables ---
-_db_initialized = False
-
-def ensure_db_init():
-    """S'assure que la base de données est initialisée"""
-    global _db_initialized
-    if not _db_initialized:
-        try:
-            Base.metadata.create_all(engine)
-            _db_initialized = True
-            print("DEBUG: Database initialized successfully")
-        except Exception as e:
-            print(f"DEBUG: Database initialization failed: {e}")
-            raise
+def _migrate_config_jsonb():
+    """Convertit config.value de json en jsonb sur les bases PostgreSQL existantes"""
+    if engine.dialect.name != "postgresql":
+        return
+    columns = {c["name"]: c["type"] for c in inspect(engine).get_columns("config")}
+    if not isinstance(columns.get("value"), JSONB):
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE config ALTER COLUMN value TYPE jsonb USING value::jsonb"))
+        print("DEBUG: Migrated config.value to jsonb")
 
 def init_db():
     """Initialise les tables de la base de données"""
-    Base.metadata.create_all(engine)
+    try:
+        Base.metadata.create_all(engine)
+        _migrate_config_jsonb()
+        print("DEBUG: Database initialized successfully")
+    except Exception as e:
+        print(f"DEBUG: Database initialization failed: {e}")
+        raise
+
+# Initialisation au chargement du module plutôt qu'à chaque appel DB. Sous
+# gunicorn (preload_app), elle s'exécute une seule fois dans le maître ; chaque
+# worker jette ensuite le pool hérité et réchauffe le sien (post_fork dans
+# gunicorn.conf.py).
+init_db()
 
 # -------------------------
 # Utilitaires DB (petits CRUD)
 # -------------------------
 def db_get_config(key: str):
-    ensure_db_init()
     with SessionLocal() as db:
-        row = db.query(Config).filter_by(key=key).one_or_none()
-        return row.value if row is not None else None
+        stmt = select(Config.value).where(Config.key == key)
+        return db.execute(stmt).scalar_one_or_none()
+
+# Cache mémoire (par processus) des blobs de config pour les pages participant.
+# Les pages admin lisent toujours la base : avec plusieurs workers gunicorn, un
+# worker ne voit pas l'invalidation faite par un autre avant l'expiration du TTL.
+CONFIG_CACHE_TTL = 60
+_config_cache: Dict[str, tuple] = {}
+
+def db_get_config_cached(key: str):
+    hit = _config_cache.get(key)
+    now = time.monotonic()
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    value = db_get_config(key)
+    _config_cache[key] = (now + CONFIG_CACHE_TTL, value)
+    return value
+
+# Dialectes supportant INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
 
 def db_set_config(key: str, value):
-    ensure_db_init()
     try:
-        with SessionLocal() as db:
-            row = db.query(Config).filter_by(key=key).one_or_none()
-            if row is None:
-                row = Config(key=key, value=value)
-                db.add(row)
-            else:
-                row.value = value
-            db.commit()
-            print(f"DEBUG: Successfully saved config {key} = {value}")
+        upsert = _UPSERT_INSERTS.get(engine.dialect.name)
+        if upsert is not None:
+            # un seul aller-retour : INSERT ... ON CONFLICT (key) DO UPDATE
+            stmt = upsert(Config).values(key=key, value=value)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Config.key], set_={"value": stmt.excluded.value}
+            )
+            with engine.begin() as conn:
+                conn.execute(stmt)
+        else:
+            with SessionLocal() as db:
+                row = db.query(Config).filter_by(key=key).one_or_none()
+                if row is None:
+                    row = Config(key=key, value=value)
+                    db.add(row)
+                else:
+                    row.value = value
+                db.commit()
+        _config_cache.pop(key, None)
+        print(f"DEBUG: Successfully saved config {key} = {value}")
     except Exception as e:
         print(f"DEBUG: Failed to save config {key}: {e}")
         raise
 
+def _clear_participants(db):
+    # TRUNCATE sur PostgreSQL : pas d'écriture WAL par ligne supprimée
+    if engine.dialect.name == "postgresql":
+        db.execute(text("TRUNCATE participants"))
+    else:
+        db.execute(delete(Participant))
+
 def db_clear_participants():
-    ensure_db_init()
     with SessionLocal() as db:
-        db.query(Participant).delete()
+        _clear_participants(db)
         db.commit()
 
 def db_get_all_participants() -> Dict[str, Dict]:
-    ensure_db_init()
     with SessionLocal() as db:
-        rows = db.query(Participant).all()
-        return {r.name: {"password": r.password, "target": r.receiver} for r in rows}
+        stmt = select(Participant.name, Participant.password, Participant.receiver)
+        rows = db.execute(stmt).all()
+        return {n: {"password": p, "target": r} for (n, p, r) in rows}
+
+def db_get_participant(name: str) -> Optional[Dict[str, str]]:
+    with SessionLocal() as db:
+        row = db.get(Participant, name)
+        return {"password": row.password, "target": row.receiver} if row is not None else None
+
+def db_has_participants() -> bool:
+    with SessionLocal() as db:
+        return db.execute(select(Participant.name).limit(1)).first() is not None
+
+def db_iter_participants() -> Iterator[Tuple[str, str, str]]:
+    """Itère sur les lignes (name, password, receiver) sans construire de dict."""
+    with SessionLocal() as db:
+        # yield_per active un curseur serveur : lignes lues par lots de 500
+        stmt = select(Participant.name, Participant.password, Participant.receiver)
+        result = db.execute(stmt.execution_options(yield_per=500))
+        for partition in result.partitions():
+            for row in partition:
+                yield tuple(row)
 
 def db_save_participants(participants: Dict[str, Dict[str, str]]):
     """
     participants : {name: {"password": pw, "target": target}}
     On écrase la table participants.
     """
-    ensure_db_init()
     with SessionLocal() as db:
-        db.query(Participant).delete()
-        for name, info in participants.items():
-            p = Participant(name=name, password=info["password"], receiver=info["target"])
-            db.add(p)
+        _clear_participants(db)
+        # un seul INSERT multi-lignes plutôt qu'un objet ORM par participant
+        rows = [
+            {"name": name, "password": info["password"], "receiver": info["target"]}
+            for name, info in participants.items()
+        ]
+        if rows:
+            db.execute(insert(Participant), rows)
         db.commit()
 
+# -------------------------
+# Matrice de compatibilité (stockée compactée : 1 bit par case)
+# -------------------------
+def pack_compat(compat: List[List[int]]) -> Dict:
+    """Matrice N×N 0/1 -> {"n": N, "bits": base64 des N² bits ligne par ligne}."""
+    n = len(compat)
+    bits = "".join("1" if c else "0" for row in compat for c in row)
+    raw = int(bits, 2).to_bytes((n * n + 7) // 8, "big") if n else b""
+    return {"n": n, "bits": base64.b64encode(raw).decode("ascii")}
+
+def unpack_compat(value) -> List[List[int]]:
+    """Inverse de pack_compat ; accepte aussi l'ancien format (liste de listes JSON)."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    n = value["n"]
+    if n == 0:
+        return []
+    bits = format(int.from_bytes(base64.b64decode(value["bits"]), "big"), f"0{n * n}b")
+    return [[1 if b == "1" else 0 for b in bits[i * n:(i + 1) * n]] for i in range(n)]
+
+def db_get_compat() -> List[List[int]]:
+    return unpack_compat(db_get_config("compat"))
+
+def db_set_compat(compat: List[List[int]]):
+    db_set_config("compat", pack_compat(compat))
+
 # -------------------------
 # Mot de passe thématique Noël
 # -------------------------
-def gen_password_christmas(existing_set: Optional[set] = None) -> str:
+def gen_passwords_christmas(n: int, existing: Optional[set] = None) -> List[str]:
+    """Génère n mots de passe festifs distincts (et absents de existing)."""
     adjectifs = [
         "joyeux", "blanc", "rouge", "vert", "dore", "argente", "brillant",
         "festif", "magique", "hivernal", "sucre", "gourmand", "glace",
@@ -145,134 +273,123 @@ def gen_password_christmas(existing_set: Optional[set] = None) -> str:
     "ruban", "pere_noel", "rudolf"
     ]
 
-    if existing_set is None:
-        existing_set = set()
-
-    # essaie d'éviter collisions en ajoutant un petit suffixe numérique si nécessaire
-    for _ in range(100):
-        candidate = f"{random.choice(noms)}_{random.choice(adjectifs)}"
-        if candidate not in existing_set:
-            return candidate
-    # fallback : ajoute un numéro aléatoire
-    return f"{random.choice(noms)}_{random.choice(adjectifs)}_{random.randint(10,99)}"
+    if existing is None:
+        existing = set()
+    seen = set(existing)
+
+    # toutes les combinaisons (~370), mélangées une fois : tirage sans collision ni réessai
+    pool = [f"{nom}_{adj}" for nom, adj in product(noms, adjectifs)]
+    pool = [p for p in pool if p not in seen]
+    random.shuffle(pool)
+    passwords = pool[:n]
+    seen.update(passwords)
+
+    # fallback pour les restants : ajoute un numéro aléatoire
+    while len(passwords) < n:
+        candidate = f"{random.choice(noms)}_{random.choice(adjectifs)}_{random.randint(10,99)}"
+        if candidate not in seen:
+            seen.add(candidate)
+            passwords.append(candidate)
+    return passwords
 # -------------------------
-# Algorithme d'affectation intelligent (backtracking avec heuristiques)
+# Algorithme d'affectation (couplage parfait biparti, Hopcroft-Karp)
 # -------------------------
-def find_assignment(names: List[str], compat_matrix: List[List[int]], max_tries: int = 100000) -> Optional[Dict[str,str]]:
+def _hopcroft_karp(adj: List[List[int]], order: List[int]) -> List[int]:
+    """
+    Couplage maximum donneurs -> receveurs en O(E·sqrt(V)).
+    adj[i] : receveurs autorisés pour le donneur i ; order : ordre de visite des donneurs.
+    Retourne match[i] = receveur du donneur i (-1 si non couplé).
+    """
+    n = len(adj)
+    match_giver = [-1] * n
+    match_receiver = [-1] * n
+    dist = [-1] * n
+
+    def bfs() -> bool:
+        # couches alternées à partir des donneurs libres
+        queue = deque()
+        for u in range(n):
+            if match_giver[u] == -1:
+                dist[u] = 0
+                queue.append(u)
+            else:
+                dist[u] = -1
+        found = False
+        while queue:
+            u = queue.popleft()
+            for v in adj[u]:
+                w = match_receiver[v]
+                if w == -1:
+                    found = True
+                elif dist[w] == -1:
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+        return found
+
+    def dfs(root: int) -> bool:
+        # chemin augmentant en suivant les couches calculées par bfs ;
+        # pile explicite : pas de limite de récursion ni de frame par niveau
+        stack = [root]
+        iters = [iter(adj[root])]
+        path = []  # path[k] : receveur choisi par le donneur stack[k]
+        while stack:
+            u = stack[-1]
+            for v in iters[-1]:
+                w = match_receiver[v]
+                if w == -1:
+                    path.append(v)
+                    for g, r in zip(stack, path):
+                        match_giver[g] = r
+                        match_receiver[r] = g
+                    return True
+                if dist[w] == dist[u] + 1:
+                    path.append(v)
+                    stack.append(w)
+                    iters.append(iter(adj[w]))
+                    break
+            else:
+                dist[u] = -1
+                stack.pop()
+                iters.pop()
+                if path:
+                    path.pop()
+        return False
+
+    while bfs():
+        for u in order:
+            if match_giver[u] == -1:
+                dfs(u)
+    return match_giver
+
+
+def find_assignment(names: List[str], compat_matrix: List[List[int]]) -> Optional[Dict[str,str]]:
+    """
+    Affectation donneur -> receveur respectant compat_matrix (personne ne s'offre à soi-même).
+    Déterministe quant au succès : retourne None seulement si aucune affectation n'existe.
+    """
     n = len(names)
     if n == 0:
         return {}
-    
-    # Vérification préalable : chaque personne doit pouvoir donner à au moins une personne
+
+    # Listes d'adjacence mélangées pour que le tirage reste aléatoire
+    # (compress filtre la ligne 0/1 en C ; la diagonale est exclue ensuite)
+    receivers = range(n)
+    adj = []
     for i in range(n):
-        if sum(compat_matrix[i]) == 0:
+        row = list(compress(receivers, compat_matrix[i]))
+        if i in row:
+            row.remove(i)
+        if not row:
             return None
-    
-    def backtrack(assignment: List[int], used_receivers: set, giver_idx: int, matrix: List[List[int]]) -> bool:
-        """Algorithme de backtracking avec vérification stricte des compatibilités"""
-        if giver_idx == n:
-            return True  # Solution trouvée
-        
-        # Obtenir tous les receveurs compatibles non utilisés
-        possible_receivers = []
-        for j in range(n):
-            if j not in used_receivers and matrix[giver_idx][j] == 1:
-                possible_receivers.append(j)
-        
-        # Mélanger pour éviter les biais
-        random.shuffle(possible_receivers)
-        
-        for receiver_idx in possible_receivers:
-            # Vérifier look-ahead : s'assurer que les donneurs restants ont des options
-            temp_used = used_receivers | {receiver_idx}
-            valid = True
-            
-            for future_giver in range(giver_idx + 1, n):
-                has_option = False
-                for future_receiver in range(n):
-                    if future_receiver not in temp_used and matrix[future_giver][future_receiver] == 1:
-                        has_option = True
-                        break
-                if not has_option:
-                    valid = False
-                    break
-            
-            if valid:
-                assignment[giver_idx] = receiver_idx
-                used_receivers.add(receiver_idx)
-                
-                if backtrack(assignment, used_receivers, giver_idx + 1, matrix):
-                    return True
-                
-                # Backtrack
-                used_receivers.remove(receiver_idx)
-                assignment[giver_idx] = -1
-        
-        return False
-    
-    # Essayer plusieurs fois avec différents ordres
-    for attempt in range(min(50, max_tries // 100 + 1)):
-        # Ordre des donneurs : plus contraints en premier
-        giver_constraints = []
-        for i in range(n):
-            constraint_count = sum(compat_matrix[i])
-            giver_constraints.append((i, constraint_count))
-        
-        giver_constraints.sort(key=lambda x: (x[1], random.random()))  # Plus contraints d'abord, avec randomisation
-        givers_order = [x[0] for x in giver_constraints]
-        
-        if attempt > 0:
-            # Mélanger un peu après le premier essai
-            random.shuffle(givers_order)
-        
-        # Créer la matrice réorganisée selon l'ordre des donneurs
-        reordered_matrix = []
-        for i in range(n):
-            original_giver = givers_order[i]
-            reordered_matrix.append(compat_matrix[original_giver][:])
-        
-        assignment = [-1] * n
-        used_receivers = set()
-        
-        if backtrack(assignment, used_receivers, 0, reordered_matrix):
-            # Reconvertir l'assignation vers les noms originaux
-            result = {}
-            for i in range(n):
-                giver_original_idx = givers_order[i]
-                receiver_idx = assignment[i]
-                result[names[giver_original_idx]] = names[receiver_idx]
-            
-            # Vérification finale de la validité
-            valid_result = True
-            for giver_name, receiver_name in result.items():
-                giver_idx = names.index(giver_name)
-                receiver_idx = names.index(receiver_name)
-                if compat_matrix[giver_idx][receiver_idx] != 1:
-                    valid_result = False
-                    break
-            
-            if valid_result:
-                return result
-    
-    # Fallback vers l'ancien algorithme si le nouveau échoue
-    return find_assignment_fallback(names, compat_matrix, max_tries)
+        random.shuffle(row)
+        adj.append(row)
+    order = list(range(n))
+    random.shuffle(order)
 
-
-def find_assignment_fallback(names: List[str], compat_matrix: List[List[int]], max_tries: int) -> Optional[Dict[str,str]]:
-    """Algorithme de fallback (ancienne méthode aléatoire)"""
-    n = len(names)
-    idx = list(range(n))
-    for _ in range(max_tries):
-        perm = idx[:]
-        random.shuffle(perm)
-        ok = True
-        for i, j in enumerate(perm):
-            if compat_matrix[i][j] != 1:
-                ok = False
-                break
-        if ok:
-            return {names[i]: names[perm[i]] for i in range(n)}
-    return None
+    match = _hopcroft_karp(adj, order)
+    if -1 in match:
+        return None
+    return {names[i]: names[match[i]] for i in range(n)}
 
 # -------------------------
 # Routes Admin / Participant (tous en français)
@@ -281,11 +398,14 @@ def find_assignment_fallback(names: List[str], compat_matrix: List[List[int]], m
 def home():
     return redirect(url_for("participant_login"))
 
+# Empreinte calculée une fois ; comparaison en temps constant dans admin_login
+_ADMIN_HASH = hashlib.sha256(b"super_santa_2025").digest()
+
 @app.route("/admin/login", methods=["GET", "POST"])
 def admin_login():
     if request.method == "POST":
         password = request.form.get("password", "")
-        if password == "super_santa_2025":
+        if hmac.compare_digest(hashlib.sha256(password.encode("utf-8")).digest(), _ADMIN_HASH):
             return redirect(url_for("admin_start"))
         else:
             flash("Mot de passe incorrect.", "danger")
@@ -318,7 +438,7 @@ def admin_start():
         
         # Ne reset la matrice que si les noms ont changé
         if names_changed:
-            db_set_config("compat", [])
+            db_set_compat([])
             print("DEBUG: Names changed, resetting compatibility matrix")
         else:
             print("DEBUG: Names unchanged, preserving compatibility matrix")
@@ -332,6 +452,14 @@ def admin_start():
     names_raw = "\n".join(names)
     return render_template("admin_start.html", names_raw=names_raw)
 
+@lru_cache(maxsize=8)
+def _render_matrix_grid_cached(names: Tuple[str, ...], compat: Tuple[Tuple[int, ...], ...]) -> Markup:
+    return Markup(render_template("_matrix_grid.html", names=names, compat=compat))
+
+def render_matrix_grid(names: List[str], compat: List[List[int]]) -> Markup:
+    """Grille N×N de cases à cocher, mise en cache par (names, compat)."""
+    return _render_matrix_grid_cached(tuple(names), tuple(map(tuple, compat)))
+
 @app.route("/admin/matrix", methods=["GET", "POST"])
 def admin_matrix():
     names = db_get_config("names") or []
@@ -342,23 +470,31 @@ def admin_matrix():
     n = len(names)
 
     if request.method == "POST":
+        # une passe sur les cases cochées (seules envoyées par le navigateur)
+        # plutôt que N² lectures du formulaire
         compat = [[0]*n for _ in range(n)]
-        for i in range(n):
-            for j in range(n):
-                key = f"c_{i}_{j}"
-                compat[i][j] = 1 if request.form.get(key) == "on" else 0
+        for key, val in request.form.items():
+            if val != "on" or not key.startswith("c_"):
+                continue
+            try:
+                _, i, j = key.split("_")
+                i, j = int(i), int(j)
+            except ValueError:
+                continue
+            if 0 <= i < n and 0 <= j < n:
+                compat[i][j] = 1
 
         # validation basique : chaque donneur doit pouvoir offrir à au moins une personne
         for i in range(n):
             if sum(compat[i]) == 0:
                 flash(f"Le participant {names[i]} ne peut offrir à personne (ligne vide).", "danger")
-                return render_template("admin_matrix.html", names=names, compat=compat)
+                return render_template("admin_matrix.html", names=names, grid=render_matrix_grid(names, compat))
 
-        db_set_config("compat", compat)
+        db_set_compat(compat)
         flash("Matrice enregistrée.", "success")
         return redirect(url_for("admin_generate"))
 
-    compat = db_get_config("compat")
+    compat = db_get_compat()
     if not compat or len(compat) != n or (len(compat) > 0 and len(compat[0]) != n):
         # Créer une nouvelle matrice si elle n'existe pas ou a une taille incorrecte
         compat = [[1]*n for _ in range(n)]
@@ -368,27 +504,25 @@ def admin_matrix():
     else:
         print("DEBUG: Using existing compatibility matrix")
 
-    return render_template("admin_matrix.html", names=names, compat=compat)
+    return render_template("admin_matrix.html", names=names, grid=render_matrix_grid(names, compat))
 
 @app.route("/admin/generate")
 def admin_generate():
     names = db_get_config("names") or []
-    compat = db_get_config("compat") or []
+    compat = db_get_compat()
     if not names or not compat:
         flash("Données manquantes. Recommencez.", "danger")
         return redirect(url_for("admin_start"))
 
-    assignment = find_assignment(names, compat, max_tries=100000)
+    assignment = find_assignment(names, compat)
     if assignment is None:
         flash("Impossible de trouver une affectation respectant la matrice. Modifiez la matrice et réessayez.", "danger")
         return redirect(url_for("admin_matrix"))
 
     # génération des mots de passe festifs, sans collision
-    existing = set()
+    passwords = gen_passwords_christmas(len(names))
     participants = {}
-    for name in names:
-        pw = gen_password_christmas(existing)
-        existing.add(pw)
+    for name, pw in zip(names, passwords):
         participants[name] = {"target": assignment[name], "password": pw}
 
     # sauvegarde en base (écrase la table participants)
@@ -401,38 +535,42 @@ def admin_generate():
 # Participant
 @app.route("/participant", methods=["GET", "POST"])
 def participant_login():
-    participants = db_get_all_participants()
-    names = list(db_get_config("names") or [])
-    if not participants:
-        flash("Aucune affectation n'est disponible. Contactez l'administrateur.", "warning")
-        return render_template("participant_login.html", names=[])
-
     if request.method == "POST":
         name = request.form.get("name")
         pwd = request.form.get("password", "")
-        if name not in participants:
-            flash("Nom invalide.", "danger")
-            return render_template("participant_login.html", names=names)
-
-        real = participants[name]["password"]
-        if pwd.strip() == real:
-            target = participants[name]["target"]
-            return render_template("participant_result.html", name=name, target=target)
-        else:
+        # une seule ligne lue par clé primaire, quelle que soit la taille de la liste
+        participant = db_get_participant(name) if name else None
+        if participant is not None:
+            if pwd.strip() == participant["password"]:
+                return render_template("participant_result.html", name=name, target=participant["target"])
             flash("Mot de passe incorrect.", "danger")
+            names = list(db_get_config_cached("names") or [])
             return render_template("participant_login.html", names=names)
 
+    if not db_has_participants():
+        flash("Aucune affectation n'est disponible. Contactez l'administrateur.", "warning")
+        return render_template("participant_login.html", names=[])
+
+    if request.method == "POST":
+        flash("Nom invalide.", "danger")
+    names = list(db_get_config_cached("names") or [])
     return render_template("participant_login.html", names=names)
 
 # Export JSON (optionnel) - retourne un dump des participants (pratique pour sauvegarde)
 @app.route("/admin/export")
 def admin_export():
-    participants = db_get_all_participants()
-    # on renvoie un JSON string manuel pour l'export (Flask Response)
-    import json
-    content = json.dumps(participants, ensure_ascii=False, indent=2)
+    # flux ligne à ligne depuis le curseur : pas de dict complet ni de gros str en mémoire
+    def generate():
+        yield "{\n"
+        sep = ""
+        for name, password, receiver in db_iter_participants():
+            entry = json.dumps({name: {"password": password, "target": receiver}}, ensure_ascii=False)
+            yield f"{sep}  {entry[1:-1]}"
+            sep = ",\n"
+        yield "\n}\n"
+
     return app.response_class(
-        content,
+        stream_with_context(generate()),
         mimetype='application/json',
         headers={"Content-Disposition": "attachment;filename=secret_santa_postgres.json"}
     )
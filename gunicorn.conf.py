@@ -0,0 +1,33 @@
+# gunicorn.conf.py
+# Lancement : gunicorn -c gunicorn.conf.py app:app (voir Procfile)
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Plusieurs processus + threads par processus : les requêtes qui attendent la
+# base ne bloquent plus les autres. WEB_CONCURRENCY (fixé par Heroku selon la
+# taille du dyno) prime sur le calcul à partir du nombre de CPU.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+keepalive = 5
+
+# Charge l'application (et init_db) une seule fois dans le maître, avant le fork :
+# pas de create_all / migration lancés en parallèle par chaque worker.
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Les connexions du pool ouvertes dans le maître ne doivent pas être
+    # partagées entre processus : chaque worker repart d'un pool vide, puis
+    # ouvre tout de suite sa propre connexion pour que sa première requête
+    # ne paie pas l'ouverture de connexion.
+    from app import engine
+    engine.dispose(close=False)
+    # Un échec ici ne doit pas empêcher le worker de démarrer (gunicorn
+    # arrêterait tout le serveur) : on démarre alors avec un pool vide.
+    try:
+        engine.connect().close()
+    except Exception as e:
+        server.log.warning("Connection pool warm-up failed in worker %s: %s", worker.pid, e)